@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+benchmark_card_detector.py
+
+Compares the learned ONNX card detector against the classical CV cascade in card_cropper_yolo.py,
+and the hybrid (learned with classical fallback) that detect_and_crop_cards runs.
+Reports per-image detection latency (debug image writes excluded), detection rate, and corner accuracy (IoU against labelled corners).
+
+Usage:
+    python benchmark_card_detector.py <labels.json> [model.onnx]
+
+labels.json is a list of {"image_path": "...", "corners": [[x, y], [x, y], [x, y], [x, y]]}.
+If no model is given, CARD_DETECTOR_MODEL or models/card_detector.onnx is used.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import cv2
+import numpy as np
+from card_cropper_yolo import load_card_detector, detect_cards_learned, detect_card_classical
+
+IOU_MATCH = 0.8
+
+def quad_iou(a, b):
+    # Convex hulls give both quads a consistent winding whatever their corner order or tilt
+    a = cv2.convexHull(np.asarray(a, dtype="float32").reshape(-1, 2))
+    b = cv2.convexHull(np.asarray(b, dtype="float32").reshape(-1, 2))
+    inter, _ = cv2.intersectConvexConvex(a, b)
+    union = cv2.contourArea(a) + cv2.contourArea(b) - inter
+    return inter / union if union > 0 else 0.0
+
+def summarize(name, seconds, ious):
+    detected = [iou for iou in ious if iou is not None]
+    matched = [iou for iou in detected if iou >= IOU_MATCH]
+    print(f"{name:<10} {1000 * seconds / len(ious):>8.1f} ms/img   "
+          f"detected {len(detected)}/{len(ious)}   "
+          f"IoU>={IOU_MATCH} {len(matched)}/{len(ious)}   "
+          f"mean IoU {np.mean(detected) if detected else 0.0:.3f}")
+
+def run_classical(labels, images, output_dir):
+    ious = []
+    for label, img in zip(labels, images):
+        try:
+            contour = detect_card_classical(img, label['image_path'], output_dir, debug=False)
+            ious.append(quad_iou(contour, label['corners']))
+        except ValueError:
+            ious.append(None)
+    return ious
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python benchmark_card_detector.py <labels.json> [model.onnx]", file=sys.stderr)
+        sys.exit(1)
+    with open(sys.argv[1]) as f:
+        labels = json.load(f)
+    images = [cv2.imread(label['image_path']) for label in labels]
+    missing = [label['image_path'] for label, img in zip(labels, images) if img is None]
+    if missing:
+        print(f"Could not read images: {missing}", file=sys.stderr)
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_dir = os.path.join(tmp_dir, 'out')
+        start = time.perf_counter()
+        classical = run_classical(labels, images, output_dir)
+        summarize('classical', time.perf_counter() - start, classical)
+
+        net = load_card_detector(sys.argv[2] if len(sys.argv) > 2 else None)
+        if net is None:
+            print("No card detector model found, skipping learned backend.", file=sys.stderr)
+            return
+        start = time.perf_counter()
+        detections = detect_cards_learned(net, images)
+        learned_seconds = time.perf_counter() - start
+        learned = [quad_iou(d[0], label['corners']) if d is not None else None for d, label in zip(detections, labels)]
+        summarize('learned', learned_seconds, learned)
+
+        # What detect_and_crop_cards runs: learned detection with per-image classical fallback
+        fallback = [i for i, d in enumerate(detections) if d is None]
+        start = time.perf_counter()
+        fallback_ious = run_classical([labels[i] for i in fallback], [images[i] for i in fallback], output_dir)
+        hybrid = list(learned)
+        for i, iou in zip(fallback, fallback_ious):
+            hybrid[i] = iou
+        summarize('hybrid', learned_seconds + time.perf_counter() - start, hybrid)
+
+if __name__ == '__main__':
+    main()
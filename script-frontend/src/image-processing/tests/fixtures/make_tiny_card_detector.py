@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+make_tiny_card_detector.py
+
+Builds tiny_card_detector.onnx, a few-hundred-byte model honouring the card detector contract
+in card_cropper_yolo.py (NCHW input, (N, 9) output). It is not a real detector:
+GlobalAveragePool -> Flatten -> Gemm -> Sigmoid always predicts corners at 10%/90% of the
+image, with a confidence that rises with mean brightness (~0.08 at 0.3, ~0.97 at 0.8).
+
+Usage:
+    python make_tiny_card_detector.py
+"""
+import os
+import numpy as np
+import onnx
+from onnx import helper, numpy_helper, TensorProto
+
+LOW, HIGH = np.log(0.1 / 0.9), np.log(0.9 / 0.1)
+
+def build():
+    weights = np.zeros((3, 9), dtype=np.float32)
+    weights[:, 8] = 4.0
+    bias = np.array([LOW, LOW, HIGH, LOW, HIGH, HIGH, LOW, HIGH, -6.0], dtype=np.float32)
+    graph = helper.make_graph(
+        [
+            helper.make_node('GlobalAveragePool', ['images'], ['pooled']),
+            helper.make_node('Flatten', ['pooled'], ['features']),
+            helper.make_node('Gemm', ['features', 'weights', 'bias'], ['logits']),
+            helper.make_node('Sigmoid', ['logits'], ['corners']),
+        ],
+        'tiny_card_detector',
+        [helper.make_tensor_value_info('images', TensorProto.FLOAT, ['N', 3, 'H', 'W'])],
+        [helper.make_tensor_value_info('corners', TensorProto.FLOAT, ['N', 9])],
+        [numpy_helper.from_array(weights, 'weights'), numpy_helper.from_array(bias, 'bias')],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 11)], producer_name='cardlister')
+    model.ir_version = 6
+    onnx.checker.check_model(model)
+    return model
+
+if __name__ == '__main__':
+    onnx.save(build(), os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tiny_card_detector.onnx'))
@@ -0,0 +1,170 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import card_cropper_yolo  # noqa: E402
+
+TINY_MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'tiny_card_detector.onnx')
+
+
+def bright_image(h=200, w=100):
+    # Mean brightness 0.8 -> tiny model confidence ~0.97
+    return np.full((h, w, 3), 204, dtype=np.uint8)
+
+
+def dark_image_with_card():
+    # Mean brightness well under 0.5 -> tiny model confidence below threshold
+    img = np.full((400, 300, 3), 30, dtype=np.uint8)
+    cv2.rectangle(img, (80, 100), (220, 300), (240, 240, 240), -1)
+    return img
+
+
+@pytest.fixture
+def net():
+    net = card_cropper_yolo.load_card_detector(TINY_MODEL)
+    assert net is not None
+    return net
+
+
+def test_load_card_detector_missing_file_returns_none(tmp_path):
+    assert card_cropper_yolo.load_card_detector(str(tmp_path / 'missing.onnx')) is None
+
+
+def test_detect_cards_learned_batches_and_scales_corners(net, monkeypatch):
+    monkeypatch.setattr(card_cropper_yolo, 'DETECTOR_BATCH_SIZE', 2)
+    batch_sizes = []
+    forward = card_cropper_yolo._forward
+
+    def spy(net, images):
+        batch_sizes.append(len(images))
+        return forward(net, images)
+
+    monkeypatch.setattr(card_cropper_yolo, '_forward', spy)
+    images = [bright_image(), bright_image(300, 150), bright_image(), bright_image(), bright_image(80, 60)]
+    detections = card_cropper_yolo.detect_cards_learned(net, images)
+
+    assert batch_sizes == [2, 2, 1]
+    assert len(detections) == 5
+    corners, confidence = detections[1]
+    np.testing.assert_allclose(corners, [[15, 30], [135, 30], [135, 270], [15, 270]], atol=0.1)
+    assert 0.9 < confidence < 1.0
+
+
+def test_detect_cards_learned_rejects_low_confidence(net, monkeypatch):
+    image = bright_image()
+    assert card_cropper_yolo.detect_cards_learned(net, [image])[0] is not None
+    monkeypatch.setattr(card_cropper_yolo, 'DETECTOR_MIN_CONFIDENCE', 0.99)
+    assert card_cropper_yolo.detect_cards_learned(net, [image]) == [None]
+
+
+def test_detect_cards_learned_retries_fixed_batch_models(monkeypatch):
+    class FixedBatchNet:
+        def setInput(self, blob):
+            pass
+
+        def forward(self):
+            return np.array([[0.1, 0.1, 0.9, 0.1, 0.9, 0.9, 0.1, 0.9, 0.8]], dtype=np.float32)
+
+    for count in (1, 2, 3, 11):
+        detections = card_cropper_yolo.detect_cards_learned(FixedBatchNet(), [bright_image()] * count)
+        assert len(detections) == count
+        assert all(d is not None for d in detections)
+
+
+def test_detect_cards_learned_ignores_unexpected_output_size():
+    class HeatmapNet:
+        def setInput(self, blob):
+            self.n = blob.shape[0]
+
+        def forward(self):
+            return np.ones((self.n, 16), dtype=np.float32)
+
+    assert card_cropper_yolo.detect_cards_learned(HeatmapNet(), [bright_image(), bright_image()]) == [None, None]
+
+
+def test_detect_cards_learned_rejects_non_finite_output():
+    class NanNet:
+        def setInput(self, blob):
+            pass
+
+        def forward(self):
+            return np.array([[0.1, 0.1, 0.9, 0.1, 0.9, 0.9, 0.1, 0.9, np.nan]], dtype=np.float32)
+
+    assert card_cropper_yolo.detect_cards_learned(NanNet(), [bright_image()]) == [None]
+
+
+def test_detect_cards_learned_keeps_tilted_corner_order():
+    class TiltedNet:
+        def setInput(self, blob):
+            pass
+
+        def forward(self):
+            # A card rotated 45 degrees, in tl/tr/br/bl order
+            return np.array([[0.5, 0.1, 0.9, 0.5, 0.5, 0.9, 0.1, 0.5, 0.9]], dtype=np.float32)
+
+    corners, _ = card_cropper_yolo.detect_cards_learned(TiltedNet(), [bright_image(100, 100)])[0]
+    np.testing.assert_allclose(corners, [[50, 10], [90, 50], [50, 90], [10, 50]], atol=0.1)
+
+
+def test_detect_and_crop_cards_reports_method_and_confidence(tmp_path):
+    bright_path = str(tmp_path / 'bright.jpg')
+    dark_path = str(tmp_path / 'dark.jpg')
+    cv2.imwrite(bright_path, bright_image())
+    cv2.imwrite(dark_path, dark_image_with_card())
+
+    results = card_cropper_yolo.detect_and_crop_cards([bright_path, dark_path], str(tmp_path / 'out'), model_path=TINY_MODEL)
+
+    assert [r['success'] for r in results] == [True, True]
+    learned, classical = results[0]['cards'][0], results[1]['cards'][0]
+    assert learned['method'] == 'learned'
+    assert 0.9 < learned['confidence'] < 1.0
+    np.testing.assert_allclose(learned['coordinates'], [[10, 20], [90, 20], [90, 180], [10, 180]], atol=0.1)
+    assert classical['method'] == 'classical'
+    assert classical['confidence'] is None
+    assert os.path.isfile(classical['cropped_path'])
+
+
+def test_detect_and_crop_cards_falls_back_when_model_breaks(tmp_path, monkeypatch):
+    def broken(net, images):
+        raise RuntimeError('bad model')
+
+    monkeypatch.setattr(card_cropper_yolo, 'detect_cards_learned', broken)
+    dark_path = str(tmp_path / 'dark.jpg')
+    cv2.imwrite(dark_path, dark_image_with_card())
+
+    results = card_cropper_yolo.detect_and_crop_cards([dark_path], str(tmp_path / 'out'), model_path=TINY_MODEL)
+
+    assert results[0]['success']
+    assert results[0]['cards'][0]['method'] == 'classical'
+
+
+def test_detect_and_crop_cards_reads_one_batch_at_a_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(card_cropper_yolo, 'DETECTOR_BATCH_SIZE', 2)
+    events = []
+    imread, detect = card_cropper_yolo.cv2.imread, card_cropper_yolo.detect_cards_learned
+
+    def spy_imread(path, *args):
+        events.append('read')
+        return imread(path, *args)
+
+    def spy_detect(net, images):
+        events.append(f'detect {len(images)}')
+        return detect(net, images)
+
+    monkeypatch.setattr(card_cropper_yolo.cv2, 'imread', spy_imread)
+    monkeypatch.setattr(card_cropper_yolo, 'detect_cards_learned', spy_detect)
+    paths = []
+    for i in range(5):
+        paths.append(str(tmp_path / f'card{i}.jpg'))
+        cv2.imwrite(paths[-1], bright_image())
+    paths.insert(2, str(tmp_path / 'missing.jpg'))
+
+    results = card_cropper_yolo.detect_and_crop_cards(paths, str(tmp_path / 'out'), model_path=TINY_MODEL)
+
+    assert events == ['read', 'read', 'detect 2', 'read', 'read', 'detect 1', 'read', 'read', 'detect 2']
+    assert [r['image_path'] for r in results] == paths
+    assert [r['success'] for r in results] == [True, True, False, True, True, True]